@@ -4,7 +4,6 @@ Supports EVSE stations using the UDP EmProto protocol (Morec and compatibles)
 """
 from __future__ import annotations
 
-import asyncio
 import logging
 from datetime import timedelta
 
@@ -12,17 +11,33 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.loader import async_get_integration
 from homeassistant.components.persistent_notification import create
 
-from .evse_client import get_evse_client, EVSEClient
+from .evse_client import get_evse_client, EVSEClient, EVSEView
+from .protocol.communicator import DEFAULT_RCVBUF_SIZE, DEFAULT_SNDBUF_SIZE
 
 _LOGGER = logging.getLogger(__name__)
 
 DOMAIN = "evsemasterudp"
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BUTTON, Platform.NUMBER]
 
- # Update interval (in seconds)
+ # Update interval (in seconds). EVSE events are pushed as they arrive; this
+ # refresh only keeps time-based fields (online / logged in) up to date.
 UPDATE_INTERVAL = timedelta(seconds=60)
+ # While no EVSE is known the refresh interval doubles up to this cap; it
+ # goes back to UPDATE_INTERVAL on the next EVSE event.
+MAX_IDLE_UPDATE_INTERVAL = timedelta(seconds=960)
+
+# Defaults for the tunables exposed in the options flow
+DEFAULT_RCVBUF_KB = DEFAULT_RCVBUF_SIZE // 1024
+DEFAULT_SNDBUF_KB = DEFAULT_SNDBUF_SIZE // 1024
+DEFAULT_DISCOVERY_TIMEOUT = 3
+DEFAULT_LOGIN_RETRIES = 3
+
+def get_option(entry: ConfigEntry, key: str, default):
+    """Read a tunable from the entry options, falling back to the entry data"""
+    return entry.options.get(key, entry.data.get(key, default))
 
 class EVSEDataUpdateCoordinator(DataUpdateCoordinator):
     """Coordinator to update EVSE data"""
@@ -36,24 +51,49 @@ class EVSEDataUpdateCoordinator(DataUpdateCoordinator):
             update_interval=UPDATE_INTERVAL,
         )
         self.client = client
+        # serial -> EVSEView.snapshot() as last published to the entities
+        self._published: dict[str, tuple] = {}
+
+    async def _push_update(self, serial: str, evse_data: EVSEView) -> None:
+        """Publish data pushed by the client on an EVSE event
+
+        Entities only need a state write when a field they show changed;
+        events that just bump last_seen are left to the periodic refresh.
+        """
+        snapshot = evse_data.snapshot()
+        if self._published.get(serial) == snapshot:
+            return
+        self._published[serial] = snapshot
+
+        # Leave idle backoff; async_set_updated_data reschedules the refresh
+        self.update_interval = UPDATE_INTERVAL
+        self.async_set_updated_data(self.client.get_all_evses())
 
     async def _async_update_data(self):
-        """Fetch EVSE data"""
+        """Fetch EVSE data
+
+        Must stay a coroutine (awaited by DataUpdateCoordinator) but never
+        awaits: the client only returns the data already pushed by the EVSEs.
+        """
         try:
-            # Retrieve all EVSEs
             evses = self.client.get_all_evses()
-
-            if not evses:
-                _LOGGER.debug("No EVSE found during update")
-                return {}
-
-            _LOGGER.debug(f"EVSE data updated: {len(evses)} stations found")
-            return evses
-            
         except Exception as err:
             _LOGGER.warning(f"Error updating EVSE data: {err}")
             # Return previous data instead of raising exception
-            return self.data if hasattr(self, 'data') and self.data else {}
+            return self.data or {}
+
+        if not evses:
+            # Back off while idle; the refresh is rescheduled with this interval
+            self.update_interval = min(self.update_interval * 2, MAX_IDLE_UPDATE_INTERVAL)
+            _LOGGER.debug("No EVSE found during update, next refresh in %s", self.update_interval)
+            return {}
+
+        self.update_interval = UPDATE_INTERVAL
+        # Entities write their state after each refresh
+        self._published = {serial: view.snapshot() for serial, view in evses.items()}
+
+        _LOGGER.debug("EVSE data updated: %s stations found", len(evses))
+        return evses
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up the EVSE integration from a config entry"""
@@ -62,11 +102,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     serial = entry.data.get("serial")
     password = entry.data.get("password")
     port = entry.data.get("port", 28376)
+    discovery_timeout = get_option(entry, "discovery_timeout_s", DEFAULT_DISCOVERY_TIMEOUT)
+    login_retries = get_option(entry, "login_retries", DEFAULT_LOGIN_RETRIES)
 
     _LOGGER.info(f"Configuring EVSE {serial} on port {port}")
     
     # Get the EVSE client
     client = get_evse_client()
+    _apply_socket_options(hass, client, entry)
 
     # Start the client if not already running
     if not client.running:
@@ -76,23 +119,28 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             _LOGGER.error(f"Unable to start EVSE client: {err}")
             return False
     
-    # Wait a bit to discover EVSEs
-    await asyncio.sleep(3)
+    # Wait for the EVSE discovery broadcast (returns at once if already known)
+    if serial and not await client.wait_for_discovery(serial, timeout=discovery_timeout):
+        _LOGGER.warning(f"EVSE {serial} not discovered yet")
     
     # Try to connect to the configured EVSE
     if serial and password:
         # Try login several times as the EVSE may not be immediately available
-        for attempt in range(3):
+        for attempt in range(login_retries):
             success = await client.login(serial, password)
             if success:
                 _LOGGER.info(f"Successfully connected to EVSE {serial}")
                 break
             else:
-                _LOGGER.warning(f"Connection attempt {attempt + 1}/3 to EVSE {serial} failed")
-                if attempt < 2:  # Wait before next attempt
-                    await asyncio.sleep(2)
+                _LOGGER.warning(f"Connection attempt {attempt + 1}/{login_retries} to EVSE {serial} failed")
+                # Back off before next attempt (0.25s, 0.5s, 1s, capped at 2s),
+                # stopping early if a login with this password completes meanwhile
+                backoff = min(0.25 * 2 ** attempt, 2)
+                if attempt < login_retries - 1 and await client.wait_for_login(serial, password, backoff):
+                    _LOGGER.info(f"Successfully connected to EVSE {serial}")
+                    break
         else:
-            _LOGGER.warning(f"Unable to connect to EVSE {serial} after 3 attempts")
+            _LOGGER.warning(f"Unable to connect to EVSE {serial} after {login_retries} attempts")
     
     # Create the data coordinator
     coordinator = EVSEDataUpdateCoordinator(hass, client)
@@ -100,6 +148,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # First data refresh
     await coordinator.async_config_entry_first_refresh()
 
+    # Push EVSE events to the entities as soon as they arrive
+    client.add_callback(entry.entry_id, coordinator._push_update)
+
     # Store the coordinator in hass.data
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
@@ -114,17 +165,55 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Set up platforms (sensor, switch, number)
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-    # Notification recommending a restart after installation/update
-    create(
-        hass,
-        f"EVSE Master UDP successfully configured for EVSE {serial}.\n\n"
-        "It is recommended to restart Home Assistant for optimal operation.",
-        title="EVSE Master UDP - Installation successful",
-        notification_id=f"evsemasterudp_setup_{serial}"
-    )
+    # Notification recommending a restart after installation/update: shown
+    # once per integration version, which is recorded in entry.data
+    version = str((await async_get_integration(hass, DOMAIN)).version)
+    if entry.data.get("setup_version") != version:
+        updated = "setup_version" in entry.data
+        create(
+            hass,
+            f"EVSE Master UDP {version} successfully configured for EVSE {serial}.\n\n"
+            "It is recommended to restart Home Assistant for optimal operation.",
+            title="EVSE Master UDP - " + ("Update successful" if updated else "Installation successful"),
+            notification_id=f"evsemasterudp_setup_{serial}"
+        )
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, "setup_version": version}
+        )
+
+    # Apply option changes without reloading the entry
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
 
     return True
 
+def _apply_socket_options(hass: HomeAssistant, client: EVSEClient, entry: ConfigEntry | None = None) -> None:
+    """Apply the UDP buffer sizes to the shared client
+
+    The socket is shared by all entries, so the largest size set on the
+    loaded entries (plus `entry`, when being set up) is used.
+    """
+    entries = [
+        loaded for entry_id in hass.data.get(DOMAIN, {})
+        if (loaded := hass.config_entries.async_get_entry(entry_id)) is not None
+    ]
+    if entry is not None and entry not in entries:
+        entries.append(entry)
+    if not entries:
+        return
+
+    client.apply_socket_options(
+        max(get_option(e, "rcvbuf_kb", DEFAULT_RCVBUF_KB) for e in entries),
+        max(get_option(e, "sndbuf_kb", DEFAULT_SNDBUF_KB) for e in entries),
+    )
+
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Handle updated entry options
+
+    Socket buffers are applied to the live socket; discovery timeout and
+    login retries are used on the next setup of the entry.
+    """
+    _apply_socket_options(hass, hass.data[DOMAIN][entry.entry_id]["client"], entry)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload the EVSE integration"""
     
@@ -134,11 +223,15 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok:
         # Clean up data
         data = hass.data[DOMAIN].pop(entry.entry_id)
+        data["client"].remove_callback(entry.entry_id)
 
         # Stop the client if there are no other entries
         if not hass.data[DOMAIN]:
             client = data["client"]
             await client.stop()
+        else:
+            # The remaining entries may want smaller socket buffers
+            _apply_socket_options(hass, data["client"])
 
     return unload_ok
 
@@ -7,10 +7,17 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 
+from . import (
+    DEFAULT_DISCOVERY_TIMEOUT,
+    DEFAULT_LOGIN_RETRIES,
+    DEFAULT_RCVBUF_KB,
+    DEFAULT_SNDBUF_KB,
+    get_option,
+)
 from .evse_client import get_evse_client
 
 _LOGGER = logging.getLogger(__name__)
@@ -57,6 +64,52 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
         )
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler"""
+        return OptionsFlowHandler(config_entry)
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Options flow for network tunables (socket buffers, setup timings)"""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize options flow"""
+        # OptionsFlow.config_entry is only set by Home Assistant from 2024.11
+        self._config_entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options"""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        entry = self._config_entry
+        schema = vol.Schema(
+            {
+                # UDP socket buffers in KiB (capped by net.core.rmem_max / wmem_max).
+                # The socket is shared: the largest value across entries applies.
+                vol.Optional(
+                    "rcvbuf_kb", default=get_option(entry, "rcvbuf_kb", DEFAULT_RCVBUF_KB)
+                ): vol.All(vol.Coerce(int), vol.Range(min=64, max=65536)),
+                vol.Optional(
+                    "sndbuf_kb", default=get_option(entry, "sndbuf_kb", DEFAULT_SNDBUF_KB)
+                ): vol.All(vol.Coerce(int), vol.Range(min=64, max=65536)),
+                # Used at setup: wait for the discovery broadcast, then log in
+                vol.Optional(
+                    "discovery_timeout_s",
+                    default=get_option(entry, "discovery_timeout_s", DEFAULT_DISCOVERY_TIMEOUT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+                vol.Optional(
+                    "login_retries", default=get_option(entry, "login_retries", DEFAULT_LOGIN_RETRIES)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=10)),
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema)
+
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate user input data"""
     
@@ -3,6 +3,8 @@ EVSE client for Home Assistant
 """
 import asyncio
 import logging
+import time
+from dataclasses import dataclass, fields
 from typing import Optional, Dict, Any, Callable
 from datetime import datetime, timedelta
 
@@ -10,6 +12,104 @@ from .protocol import Communicator, EVSE, get_communicator
 
 _LOGGER = logging.getLogger(__name__)
 
+# Values used while an EVSE has not reported its state / charging session yet
+_DEFAULT_ELECTRICAL: Dict[str, Any] = {
+    'current_power': 0,
+    'voltage_l1': 0,
+    'voltage_l2': 0,
+    'voltage_l3': 0,
+    'current_l1': 0,
+    'current_l2': 0,
+    'current_l3': 0,
+    'temperature_inner': 0,
+    'temperature_outer': 0,
+    'gun_state': 0,
+    'output_state': 0,
+    'errors': (),
+}
+
+_DEFAULT_CHARGE: Dict[str, Any] = {
+    'charge_kwh': 0,
+    'charge_id': '',
+    'start_date': None,
+    'duration_seconds': 0,
+    'charge_state': 0,
+}
+
+@dataclass(slots=True)
+class EVSEView:
+    """Serialized view of an EVSE, as exposed to Home Assistant entities
+
+    Fields are read as attributes; get(), subscript access and `in` are
+    kept for code written against the former dict format (the view is not
+    a mapping otherwise: no keys(), iteration or item assignment).
+    """
+    serial: str
+    ip: str = ''
+    port: int = 0
+    last_seen: Optional[datetime] = None
+    online: bool = False
+    logged_in: bool = False
+    state: str = 'OFFLINE'
+    
+    # EVSE information
+    brand: str = ''
+    model: str = ''
+    hardware_version: str = ''
+    software_version: str = ''
+    max_power: int = 0
+    max_electricity: int = 0
+    phases: int = 1
+    
+    # Configuration
+    name: str = 'EVSEMaster'
+    configured_max_electricity: int = 0
+    temperature_unit: int = 1
+    
+    # Electrical state
+    current_power: float = 0
+    voltage_l1: float = 0
+    voltage_l2: float = 0
+    voltage_l3: float = 0
+    current_l1: float = 0
+    current_l2: float = 0
+    current_l3: float = 0
+    temperature_inner: float = 0
+    temperature_outer: float = 0
+    gun_state: int = 0
+    output_state: int = 0
+    errors: Any = ()
+    
+    # Charging session
+    charge_kwh: float = 0
+    charge_id: str = ''
+    start_date: Any = None
+    duration_seconds: int = 0
+    charge_state: int = 0
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style access to a field"""
+        return getattr(self, key, default)
+    
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def __contains__(self, key: object) -> bool:
+        return key in _FIELD_NAMES
+    
+    def snapshot(self) -> tuple:
+        """Values of the fields that change entity states
+        
+        last_seen is left out: every datagram bumps it.
+        """
+        return tuple(getattr(self, name) for name in _SNAPSHOT_FIELDS)
+
+_FIELD_NAMES = frozenset(f.name for f in fields(EVSEView))
+_SNAPSHOT_FIELDS = tuple(f.name for f in fields(EVSEView) if f.name != 'last_seen')
+
 class EVSEClient:
     """Client for communicating with EVSE stations via UDP"""
     
@@ -18,10 +118,17 @@ class EVSEClient:
         self.communicator = get_communicator()
         self.running = False
         self.callbacks: Dict[str, Callable] = {}
+        self._callbacks_snapshot: tuple = ()  # Rebuilt when callbacks change
+
+        # Serialized EVSE data, updated in place: serial -> view / version key
+        self._evse_views: Dict[str, EVSEView] = {}
+        self._view_versions: Dict[str, tuple] = {}
+        self._all_evses_cache: Optional[Dict[str, EVSEView]] = None
         
     # Protection against rapid changes
         self._fast_change_protection: Dict[str, int] = {}  # serial -> minutes
-        self._last_charge_change: Dict[str, datetime] = {}  # serial -> timestamp
+        # serial -> time.monotonic() timestamp (immune to wall-clock/NTP jumps)
+        self._last_charge_change: Dict[str, float] = {}
         
     async def start(self):
         """Start the UDP client"""
@@ -46,119 +153,154 @@ class EVSEClient:
         self.running = False
         self.communicator.remove_callback('evse_client')
         await self.communicator.stop()
+        self._clear_cache()
         _LOGGER.info("EVSE client stopped")
     
+    def apply_socket_options(self, rcvbuf_kb: int, sndbuf_kb: int):
+        """Set the UDP socket buffer sizes (in KiB), live if already started"""
+        self.communicator.set_buffer_sizes(rcvbuf_kb * 1024, sndbuf_kb * 1024)
+    
+    def _clear_cache(self):
+        """Drop the serialized EVSE data (rebuilt on next access)"""
+        self._evse_views.clear()
+        self._view_versions.clear()
+        self._all_evses_cache = None
+    
     async def _handle_evse_event(self, event: str, evse: EVSE):
         """Handle EVSE events"""
-        # Convert EVSE to Home Assistant compatible format
-        evse_data = self._evse_to_dict(evse)
+        # Convert EVSE to Home Assistant compatible format. This refreshes the
+        # shared view, so get_evse()/get_all_evses() return the same object.
+        evse_data = self._evse_to_view(evse)
         
-        # Notify our callbacks
-        for callback in self.callbacks.values():
+        # Notify our callbacks, concurrently when there are several
+        callbacks = self._callbacks_snapshot
+        serial = evse.info.serial
+        if len(callbacks) == 1:
             try:
-                await callback(evse.info.serial, evse_data)
+                await callbacks[0](serial, evse_data)
             except Exception as e:
                 _LOGGER.error(f"Error in callback: {e}")
+        elif callbacks:
+            results = await asyncio.gather(
+                *(callback(serial, evse_data) for callback in callbacks),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    _LOGGER.error(f"Error in callback: {result}")
     
-    def _evse_to_dict(self, evse: EVSE) -> Dict[str, Any]:
-        """Convert an EVSE object to a dictionary"""
-        data = {
-            'serial': evse.info.serial,
-            'ip': evse.info.ip,
-            'port': evse.info.port,
-            'last_seen': evse.last_seen,
-            'online': evse.is_online(),
-            'logged_in': evse.is_logged_in(),
-            'state': evse.get_meta_state(),
-            
-            # EVSE information
-            'brand': evse.info.brand,
-            'model': evse.info.model,
-            'hardware_version': evse.info.hardware_version,
-            'software_version': evse.info.software_version,
-            'max_power': evse.info.max_power,
-            'max_electricity': evse.info.max_electricity,
-            'phases': evse.info.phases,
-            
-            # Configuration
-            'name': evse.config.name or 'EVSEMaster',
-            'configured_max_electricity': evse.config.max_electricity,
-            'temperature_unit': evse.config.temperature_unit,
-        }
+    def _evse_to_view(self, evse: EVSE) -> EVSEView:
+        """Convert an EVSE object to its serialized view
+
+        Each EVSE keeps a single view that is updated in place, and only when
+        the EVSE changed (last_seen, state_version or online/login status).
+        The same view object is returned on every call and is shared with
+        every caller: read it, do not modify it.
+        """
+        info = evse.info
+        serial = info.serial
+        online = evse.is_online()
+        logged_in = evse.is_logged_in()
+        key = (evse.last_seen, evse.state_version, online, logged_in)
+        view = self._evse_views.get(serial)
+        if view is not None and self._view_versions.get(serial) == key:
+            return view
+        if view is None:
+            view = self._evse_views[serial] = EVSEView(serial)
+        
+        cfg = evse.config
+        st = evse.state
+        ch = evse.current_charge
+        
+        view.ip = info.ip
+        view.port = info.port
+        view.last_seen = evse.last_seen
+        view.online = online
+        view.logged_in = logged_in
+        view.state = evse.get_meta_state()
+        
+    # EVSE information
+        view.brand = info.brand
+        view.model = info.model
+        view.hardware_version = info.hardware_version
+        view.software_version = info.software_version
+        view.max_power = info.max_power
+        view.max_electricity = info.max_electricity
+        view.phases = info.phases
+        
+    # Configuration
+        view.name = cfg.name or 'EVSEMaster'
+        view.configured_max_electricity = cfg.max_electricity
+        view.temperature_unit = cfg.temperature_unit
         
     # Electrical state
-        if evse.state:
-            data.update({
-                'current_power': evse.state.current_power,
-                'voltage_l1': evse.state.l1_voltage,
-                'voltage_l2': evse.state.l2_voltage,
-                'voltage_l3': evse.state.l3_voltage,
-                'current_l1': evse.state.l1_electricity,
-                'current_l2': evse.state.l2_electricity,
-                'current_l3': evse.state.l3_electricity,
-                'temperature_inner': evse.state.inner_temp,
-                'temperature_outer': evse.state.outer_temp,
-                'gun_state': evse.state.gun_state,
-                'output_state': evse.state.output_state,
-                'errors': evse.state.errors,
-            })
+        if st is not None:
+            view.current_power = st.current_power
+            view.voltage_l1 = st.l1_voltage
+            view.voltage_l2 = st.l2_voltage
+            view.voltage_l3 = st.l3_voltage
+            view.current_l1 = st.l1_electricity
+            view.current_l2 = st.l2_electricity
+            view.current_l3 = st.l3_electricity
+            view.temperature_inner = st.inner_temp
+            view.temperature_outer = st.outer_temp
+            view.gun_state = st.gun_state
+            view.output_state = st.output_state
+            view.errors = st.errors
         else:
             # Default values if no state
-            data.update({
-                'current_power': 0,
-                'voltage_l1': 0,
-                'voltage_l2': 0,
-                'voltage_l3': 0,
-                'current_l1': 0,
-                'current_l2': 0,
-                'current_l3': 0,
-                'temperature_inner': 0,
-                'temperature_outer': 0,
-                'gun_state': 0,
-                'output_state': 0,
-                'errors': [],
-            })
+            for field, value in _DEFAULT_ELECTRICAL.items():
+                setattr(view, field, value)
         
     # Charging session
-        if evse.current_charge:
-            data.update({
-                'charge_kwh': evse.current_charge.charge_kwh,
-                'charge_id': evse.current_charge.charge_id,
-                'start_date': evse.current_charge.start_date,
-                'duration_seconds': evse.current_charge.duration_seconds,
-                'charge_state': evse.current_charge.current_state,
-            })
+        if ch is not None:
+            view.charge_kwh = ch.charge_kwh
+            view.charge_id = ch.charge_id
+            view.start_date = ch.start_date
+            view.duration_seconds = ch.duration_seconds
+            view.charge_state = ch.current_state
         else:
-            data.update({
-                'charge_kwh': 0,
-                'charge_id': '',
-                'start_date': None,
-                'duration_seconds': 0,
-                'charge_state': 0,
-            })
+            for field, value in _DEFAULT_CHARGE.items():
+                setattr(view, field, value)
         
-        return data
+        self._view_versions[serial] = key
+        return view
     
     def add_callback(self, name: str, callback: Callable):
         """Add a callback for state changes"""
         self.callbacks[name] = callback
+        self._callbacks_snapshot = tuple(self.callbacks.values())
     
     def remove_callback(self, name: str):
         """Remove a callback"""
         self.callbacks.pop(name, None)
+        self._callbacks_snapshot = tuple(self.callbacks.values())
     
-    def get_evse(self, serial: str) -> Optional[Dict[str, Any]]:
-        """Get the data for an EVSE"""
+    def get_evse(self, serial: str) -> Optional[EVSEView]:
+        """Get the (shared, read-only) view of an EVSE"""
         evse = self.communicator.get_evse(serial)
         if evse:
-            return self._evse_to_dict(evse)
+            return self._evse_to_view(evse)
         return None
     
-    def get_all_evses(self) -> Dict[str, Dict[str, Any]]:
-        """Get all EVSEs"""
+    def get_all_evses(self) -> Dict[str, EVSEView]:
+        """Get all EVSEs
+
+        Per-EVSE views are updated in place, so the previous result is
+        returned as long as the set of EVSEs is unchanged.
+        """
+        evses = self.communicator.get_all_evses()
+        cached = self._all_evses_cache
+        if cached is not None and len(cached) == len(evses) and all(
+            cached.get(serial) is self._evse_to_view(evse)
+            for serial, evse in evses.items()
+        ):
+            return cached
+
         result = {}
-        for serial, evse in self.communicator.get_all_evses().items():
-            result[serial] = self._evse_to_dict(evse)
+        for serial, evse in evses.items():
+            result[serial] = self._evse_to_view(evse)
+        self._all_evses_cache = result
         return result
     
     async def login(self, serial: str, password: str) -> bool:
@@ -170,6 +312,24 @@ class EVSEClient:
         
         return await evse.login(password)
     
+    async def wait_for_discovery(self, serial: str, timeout: float) -> bool:
+        """Wait until an EVSE has been discovered (returns immediately if known)"""
+        try:
+            await asyncio.wait_for(self.communicator.evse_discovered(serial).wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+    
+    async def wait_for_login(self, serial: str, password: str, timeout: float) -> bool:
+        """Wait until a login to an EVSE with this password has completed"""
+        evse = self.communicator.get_evse(serial)
+        if not evse:
+            # Nothing to log in to yet, wait for the EVSE to show up instead
+            await self.wait_for_discovery(serial, timeout)
+            return False
+        
+        return await evse.wait_for_login(password, timeout)
+    
     async def start_charging(self, serial: str, amps: int = None, single_phase: bool = False) -> bool:
         """Start charging"""
         
@@ -266,12 +426,11 @@ class EVSEClient:
         if last_change is None:
             return True
         
-        time_since_last = datetime.now() - last_change
-        min_interval = timedelta(minutes=protection_minutes)
+        time_since_last = time.monotonic() - last_change
+        min_interval = protection_minutes * 60.0
         
         if time_since_last < min_interval:
-            remaining = min_interval - time_since_last
-            remaining_minutes = remaining.total_seconds() / 60
+            remaining_minutes = (min_interval - time_since_last) / 60
             _LOGGER.warning(
                 f"Start protection active for {serial}: "
                 f"wait another {remaining_minutes:.1f} minutes since the last stop "
@@ -283,8 +442,8 @@ class EVSEClient:
     
     def _record_charge_state_change(self, serial: str) -> None:
         """Record a charge stop (to protect the next start)"""
-        self._last_charge_change[serial] = datetime.now()
-    _LOGGER.debug(f"Charge stop recorded for {serial}")
+        self._last_charge_change[serial] = time.monotonic()
+        _LOGGER.debug("Charge stop recorded for %s", serial)
 
     # --- Utility exposure for UI / sensors ---
     def get_cooldown_remaining(self, serial: str) -> timedelta:
@@ -296,14 +455,10 @@ class EVSEClient:
         if protection_minutes == 0:
             return timedelta(0)
         last_change = self._last_charge_change.get(serial)
-        if not last_change:
-            return timedelta(0)
-        min_interval = timedelta(minutes=protection_minutes)
-        elapsed = datetime.now() - last_change
-        remaining = min_interval - elapsed
-        if remaining.total_seconds() < 0:
+        if last_change is None:
             return timedelta(0)
-        return remaining
+        remaining = protection_minutes * 60.0 - (time.monotonic() - last_change)
+        return timedelta(seconds=max(0.0, remaining))
 
 # Singleton to share the instance between HA components
 _client_instance: Optional[EVSEClient] = None
@@ -9,6 +9,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import DOMAIN
+from .evse_client import EVSEView
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -61,8 +62,7 @@ class EVSECurrentControl(CoordinatorEntity, NumberEntity):
     @property
     def native_value(self) -> float | None:
         """Return the current configured maximum current value"""
-        data = self.evse_data
-        return data.get("configured_max_electricity", 6)
+        return getattr(self.evse_data, "configured_max_electricity", 6)
     
     @property
     def available(self) -> bool:
@@ -100,7 +100,7 @@ class EVSEFastChangeProtection(CoordinatorEntity, NumberEntity):
         self._protection_minutes = 1  # Default: 1 minute
     
     @property
-    def evse_data(self) -> dict:
+    def evse_data(self) -> EVSEView | dict:
         """EVSE data from the coordinator"""
         return self.coordinator.data.get(self.serial, {})
     
@@ -5,7 +5,7 @@ import asyncio
 import socket
 import struct
 import logging
-from typing import Dict, Optional, Callable, Any, List
+from typing import Dict, Optional, Callable, Any, List, Tuple
 from datetime import datetime, timedelta
 
 from .datagram import Datagram, parse_datagrams
@@ -19,6 +19,13 @@ from .datagrams import (
 
 _LOGGER = logging.getLogger(__name__)
 
+# Socket buffer sizes (the kernel caps them at net.core.rmem_max / wmem_max)
+DEFAULT_RCVBUF_SIZE = 4 * 1024 * 1024
+DEFAULT_SNDBUF_SIZE = 1 * 1024 * 1024
+
+# Maximum number of datagrams read from the socket per wakeup
+RECV_BATCH_SIZE = 32
+
 class EVSEInfo:
     """Information about an EVSE"""
     def __init__(self, serial: str, ip: str, port: int):
@@ -96,10 +103,13 @@ class EVSE:
         self.current_charge: Optional[EVSECurrentCharge] = None
         
         self.last_seen = datetime.now()
+        self.state_version = 0  # Bumped on every notified change
         self.last_active_login: Optional[datetime] = None
         self.password: Optional[str] = None
         self._logged_in = False
-        self._last_response = None  # To wait for authentication responses
+        self.login_event = asyncio.Event()  # Set while logged in
+        # Pending (expected commands, future) pairs, resolved by the communicator
+        self._response_waiters: List[Tuple[tuple, asyncio.Future]] = []
         
         # Possible states according to the protocol
         self.GUN_STATES = {
@@ -169,26 +179,27 @@ class EVSE:
             _LOGGER.info(f"Attempting to connect to {self.info.serial} with password")
             
             # 0. Reset connection state before starting
-            self._logged_in = False
-            self.last_active_login = None
+            self._reset_login()
             
-            # 1. Send RequestLogin with password
+            # 1. Build RequestLogin with password
             login_request = RequestLogin()
             login_request.set_device_serial(self.info.serial)
             login_request.set_device_password(password)
             
-            await self.send_datagram(login_request)
-            _LOGGER.debug(f"RequestLogin sent to {self.info.serial}")
-            
-            # 2. Wait for LoginResponse or PasswordErrorResponse (max 3 seconds)
-            response = await self._wait_for_response([LoginResponse.COMMAND, PasswordErrorResponse.COMMAND], 3.0)
+            # 2. Send it and wait for LoginResponse or PasswordErrorResponse (max 3 seconds)
+            _LOGGER.debug("Sending RequestLogin to %s", self.info.serial)
+            response = await self._wait_for_response(
+                [LoginResponse.COMMAND, PasswordErrorResponse.COMMAND], 3.0, request=login_request
+            )
             
             if response and response.get_command() == PasswordErrorResponse.COMMAND:
                 _LOGGER.error(f"Incorrect password for {self.info.serial}")
+                self._reset_login()
                 return False
             
             if not response or response.get_command() != LoginResponse.COMMAND:
                 _LOGGER.error(f"No login response from {self.info.serial}")
+                self._reset_login()
                 return False
             
             # 3. Password correct, save and send LoginConfirm
@@ -201,10 +212,11 @@ class EVSE:
             login_confirm.set_device_password(password)
             
             await self.send_datagram(login_confirm)
-            _LOGGER.debug(f"LoginConfirm sent to {self.info.serial}")
+            _LOGGER.debug("LoginConfirm sent to %s", self.info.serial)
             
             # 5. Mark as connected
             self._logged_in = True
+            self.login_event.set()
             self.last_active_login = datetime.now()
             _LOGGER.info(f"Connection established with {self.info.serial}")
             
@@ -218,25 +230,63 @@ class EVSE:
                 
         except Exception as e:
             _LOGGER.error(f"Error while connecting to {self.info.serial}: {e}")
+            self._reset_login()
             return False
     
-    async def _wait_for_response(self, expected_commands: list, timeout: float):
-        """Wait for a response with specific commands"""
-        start_time = asyncio.get_event_loop().time()
-        
-    # Ignore any previous response by resetting to zero
-        self._last_response = None
-        
-        while (asyncio.get_event_loop().time() - start_time) < timeout:
-            # Check if a new response with an expected command was received
-            if self._last_response and self._last_response.get_command() in expected_commands:
-                response = self._last_response
-                self._last_response = None  # Consume the response
-                return response
-            
-            await asyncio.sleep(0.1)
+    def _reset_login(self):
+        """Mark the EVSE as logged out
+
+        Also undoes a discovery broadcast received during a failed login,
+        which would otherwise leave the EVSE logged in without a password.
+        """
+        self._logged_in = False
+        self.login_event.clear()
+        self.last_active_login = None
+    
+    async def wait_for_login(self, password: str, timeout: float) -> bool:
+        """Wait until a login with this password has completed
+
+        Discovery broadcasts also set login_event but do not check any
+        password, so they do not count; the full timeout is then waited.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            await asyncio.wait_for(self.login_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        if self.password == password and self.is_logged_in():
+            return True
+        await asyncio.sleep(max(0.0, deadline - loop.time()))
+        return False
+    
+    async def _wait_for_response(self, expected_commands: list, timeout: float,
+                                 request: Optional[Datagram] = None):
+        """Wait for a response with specific commands
+
+        The waiter is registered before `request` (if given) is sent, so a
+        fast response cannot be missed. Several calls may wait concurrently;
+        each response goes to the first waiter expecting its command.
+        """
+        pending = (tuple(expected_commands), asyncio.get_running_loop().create_future())
+        self._response_waiters.append(pending)
         
-        return None
+        try:
+            if request is not None:
+                await self.send_datagram(request)
+            return await asyncio.wait_for(pending[1], timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._response_waiters.remove(pending)
+    
+    def _deliver_response(self, datagram: Datagram):
+        """Hand a received datagram to the first pending waiter expecting it"""
+        command = datagram.get_command()
+        for expected_commands, waiter in self._response_waiters:
+            if not waiter.done() and command in expected_commands:
+                waiter.set_result(datagram)
+                return
     
     async def _fetch_config(self):
         """Fetch the EVSE configuration"""
@@ -245,7 +295,7 @@ class EVSE:
         heading.set_device_serial(self.info.serial)
         heading.set_device_password(self.password)
         await self.send_datagram(heading)
-        _LOGGER.debug(f"Configuration request sent to {self.info.serial}")
+        _LOGGER.debug("Configuration request sent to %s", self.info.serial)
     
     async def charge_start(self, max_amps: int = 6, single_phase: bool = False, 
                           user_id: str = "", charge_id: str = "") -> bool:
@@ -311,11 +361,11 @@ class EVSE:
             set_current.action = 1  # SET action
             set_current.electricity = amps
             
-            await self.send_datagram(set_current)
-            _LOGGER.debug(f"SetAndGetOutputElectricity sent to {self.info.serial}")
-            
-            # Wait for SetAndGetOutputElectricityResponse
-            response = await self._wait_for_response([SetAndGetOutputElectricityResponse.COMMAND], 5.0)
+            # Send it and wait for SetAndGetOutputElectricityResponse
+            _LOGGER.debug("Sending SetAndGetOutputElectricity to %s", self.info.serial)
+            response = await self._wait_for_response(
+                [SetAndGetOutputElectricityResponse.COMMAND], 5.0, request=set_current
+            )
             
             if not response:
                 _LOGGER.error(f"No response for set_max_electricity from {self.info.serial}")
@@ -374,12 +424,17 @@ class EVSE:
 class Communicator:
     """Main UDP communicator"""
     
-    def __init__(self, port: int = 28376):
+    def __init__(self, port: int = 28376, rcvbuf_size: int = DEFAULT_RCVBUF_SIZE,
+                 sndbuf_size: int = DEFAULT_SNDBUF_SIZE):
         self.port = port
+        self.rcvbuf_size = rcvbuf_size
+        self.sndbuf_size = sndbuf_size
         self.socket: Optional[socket.socket] = None
         self.running = False
         self.evses: Dict[str, EVSE] = {}
         self.callbacks: Dict[str, Callable] = {}
+        self._discovery_events: Dict[str, asyncio.Event] = {}
+        self._listen_task: Optional[asyncio.Task] = None
         self._periodic_task: Optional[asyncio.Task] = None
     
     async def start(self) -> int:
@@ -388,7 +443,10 @@ class Communicator:
             return self.port
         
         try:
-            # Create the UDP socket
+            # Create the UDP socket. A single socket is used on purpose:
+            # SO_REUSEPORT shards would each receive a copy of every discovery
+            # broadcast and would still be served by the same event loop, and
+            # SO_INCOMING_CPU only steers packets between such shards.
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             self.socket.setblocking(False)
             self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -400,11 +458,13 @@ class Communicator:
             except OSError:
                 _LOGGER.warning("Broadcast not supported")
             
+            self._apply_buffer_sizes()
+            
             self.running = True
             _LOGGER.info(f"Communicator started on port {self.port}")
             
             # Start asyncio tasks
-            asyncio.create_task(self._listen_loop())
+            self._listen_task = asyncio.create_task(self._listen_loop())
             self._periodic_task = asyncio.create_task(self._periodic_checks())
             
             return self.port
@@ -413,10 +473,35 @@ class Communicator:
             _LOGGER.error(f"Erreur lors du démarrage: {e}")
             raise
     
+    def set_buffer_sizes(self, rcvbuf_size: int, sndbuf_size: int):
+        """Change the socket buffer sizes (applied at once if running)"""
+        self.rcvbuf_size = rcvbuf_size
+        self.sndbuf_size = sndbuf_size
+        if self.socket:
+            self._apply_buffer_sizes()
+    
+    def _apply_buffer_sizes(self):
+        """Enlarge the socket buffers to absorb bursts of datagrams"""
+        for option, size, label in (
+            (socket.SO_RCVBUF, self.rcvbuf_size, "receive"),
+            (socket.SO_SNDBUF, self.sndbuf_size, "send"),
+        ):
+            try:
+                self.socket.setsockopt(socket.SOL_SOCKET, option, size)
+                granted = self.socket.getsockopt(socket.SOL_SOCKET, option)
+                _LOGGER.debug("UDP %s buffer: requested %s bytes, granted %s bytes", label, size, granted)
+            except OSError as e:
+                _LOGGER.warning(f"Unable to set UDP {label} buffer to {size} bytes: {e}")
+    
     async def stop(self):
         """Stop the communicator"""
         self.running = False
         
+        # Cancel the listen task before closing the socket it waits on
+        if self._listen_task:
+            self._listen_task.cancel()
+            self._listen_task = None
+        
         if self._periodic_task:
             self._periodic_task.cancel()
         
@@ -427,28 +512,32 @@ class Communicator:
         _LOGGER.info("Communicator stopped")
     
     async def _listen_loop(self):
-        """UDP listen loop"""
-        while self.running and self.socket:
-            try:
-                await asyncio.sleep(0.01)  # Avoid blocking
-                
+        """UDP listen loop
+
+        Waits for the socket to become readable, then drains every datagram
+        already queued (up to RECV_BATCH_SIZE) before waiting again.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while self.running and self.socket:
                 try:
-                    # Check that the socket still exists
-                    if not self.socket:
-                        break
-                        
-                    data, addr = self.socket.recvfrom(1024)
-                    await self._handle_message(data, addr)
-                except socket.error:
-                    # No data available
-                    continue
+                    batch = [await loop.sock_recvfrom(self.socket, 1024)]
+                    while len(batch) < RECV_BATCH_SIZE:
+                        try:
+                            batch.append(self.socket.recvfrom(1024))
+                        except (BlockingIOError, InterruptedError):
+                            # No more data queued
+                            break
                     
-            except Exception as e:
-                if self.running and self.socket:  # Only log if we should still be running
-                    _LOGGER.error(f"Error in listen loop: {e}")
-                await asyncio.sleep(1)
-        
-        _LOGGER.debug("UDP listen loop ended")
+                    for data, addr in batch:
+                        await self._handle_message(data, addr)
+                        
+                except Exception as e:
+                    if self.running and self.socket:  # Only log if we should still be running
+                        _LOGGER.error(f"Error in listen loop: {e}")
+                    await asyncio.sleep(1)
+        finally:
+            _LOGGER.debug("UDP listen loop ended")
     
     async def _handle_message(self, data: bytes, addr: tuple):
         """Handle a received message"""
@@ -459,7 +548,7 @@ class Communicator:
                 await self._process_datagram(datagram, addr)
                 
         except Exception as e:
-            _LOGGER.debug(f"Error while handling message: {e}")
+            _LOGGER.debug("Error while handling message: %s", e)
     
     async def _process_datagram(self, datagram: Datagram, addr: tuple):
         """Handle a received datagram"""
@@ -475,14 +564,15 @@ class Communicator:
             evse = EVSE(self, serial, ip, port)
             self.evses[serial] = evse
             _LOGGER.info(f"New EVSE discovered: {serial} @ {ip}")
+            self.evse_discovered(serial).set()
             await self._notify_callbacks('evse_added', evse)
         else:
             # Update IP if changed
             if evse.update_ip(ip, port):
                 await self._notify_callbacks('evse_changed', evse)
-        # Update last_seen and store the response for authentication
+        # Update last_seen and wake up a pending _wait_for_response
         evse.last_seen = datetime.now()
-        evse._last_response = datagram  # Store for _wait_for_response
+        evse._deliver_response(datagram)
         # Handle the specific datagram
         if isinstance(datagram, Login):
             await self._handle_login(evse, datagram)
@@ -505,7 +595,7 @@ class Communicator:
         elif isinstance(datagram, PasswordErrorResponse):
             # PasswordErrorResponses are handled in the login() method via _wait_for_response
             # Ignore those arriving here to avoid misleading error logs
-            _LOGGER.debug(f"PasswordErrorResponse received for {serial} (handled by auth logic)")
+            _LOGGER.debug("PasswordErrorResponse received for %s (handled by auth logic)", serial)
         # elif isinstance(datagram, UnknownCommand341):
         #     _LOGGER.debug(f"Commande 341 reçue de {serial}, données: {datagram.raw_data.hex()}")
         #     # Pas de traitement spécial nécessaire pour l'instant
@@ -535,6 +625,7 @@ class Communicator:
         confirm.set_device_password(evse.password)
         await evse.send_datagram(confirm)
         evse._logged_in = True
+        evse.login_event.set()
         await self._notify_callbacks('evse_logged_in', evse)
     
     async def _handle_status(self, evse: EVSE, datagram: SingleACStatus):
@@ -557,7 +648,7 @@ class Communicator:
         evse.state.gun_state = datagram.gun_state
         evse.state.output_state = datagram.output_state
         evse.state.errors = datagram.errors
-        _LOGGER.debug(f"Status received for {evse.info.serial}: L1={datagram.l1_voltage}V, Temp={datagram.inner_temp}°C")
+        _LOGGER.debug("Status received for %s: L1=%sV, Temp=%s°C", evse.info.serial, datagram.l1_voltage, datagram.inner_temp)
         # Respond to status
         response = SingleACStatusResponse()
         response.set_device_serial(evse.info.serial)
@@ -567,7 +658,7 @@ class Communicator:
     
     async def _handle_charging_status(self, evse: EVSE, datagram: SingleACChargingStatusPublicAuto):
         """Handle automatic AC charging status (command 0x0005)"""
-        _LOGGER.debug(f"Charge status received for {evse.info.serial}")
+        _LOGGER.debug("Charge status received for %s", evse.info.serial)
         # Update charge information if available
         if not evse.current_charge:
             evse.current_charge = EVSECurrentCharge()
@@ -625,7 +716,6 @@ class Communicator:
         evse.current_charge.charge_price = datagram.charge_price
         evse.current_charge.fee_type = datagram.fee_type
         evse.current_charge.charge_fee = datagram.charge_fee
-        evse._last_response = datagram  # Store for _wait_for_response
         await self._notify_callbacks('evse_charge_changed', evse)
     
     async def _handle_heading(self, evse: EVSE, datagram: Heading):
@@ -638,8 +728,8 @@ class Communicator:
     
     async def _handle_output_electricity_response(self, evse: EVSE, datagram: SetAndGetOutputElectricityResponse):
         """Handle a current configuration response"""
-        _LOGGER.debug(f"Output current response received from {evse.info.serial}: {datagram.electricity}A")
-        # The response is automatically stored in evse._last_response for _wait_for_response
+        _LOGGER.debug("Output current response received from %s: %sA", evse.info.serial, datagram.electricity)
+        # The response is automatically delivered to _wait_for_response
         # Update local configuration if it's a SET confirmation
         if hasattr(datagram, 'action') and datagram.action == 1:  # SET action
             evse.config.max_electricity = datagram.electricity
@@ -694,6 +784,7 @@ class Communicator:
     
     async def _notify_callbacks(self, event: str, evse: EVSE):
         """Notify callbacks"""
+        evse.state_version += 1
         for callback in self.callbacks.values():
             try:
                 await callback(event, evse)
@@ -708,6 +799,16 @@ class Communicator:
         """Remove a callback"""
         self.callbacks.pop(name, None)
     
+    def evse_discovered(self, serial: str) -> asyncio.Event:
+        """Get an event that is set once the EVSE has been discovered"""
+        event = self._discovery_events.get(serial)
+        if event is None:
+            event = asyncio.Event()
+            if serial in self.evses:
+                event.set()
+            self._discovery_events[serial] = event
+        return event
+    
     def get_evse(self, serial: str) -> Optional[EVSE]:
         """Get an EVSE by its serial number"""
         return self.evses.get(serial)
@@ -728,7 +829,7 @@ class Communicator:
             try:
                 self.socket.close()
             except Exception as e:
-                _LOGGER.debug(f"Error while closing socket: {e}")
+                _LOGGER.debug("Error while closing socket: %s", e)
             finally:
                 self.socket = None
         
@@ -8,6 +8,12 @@ import logging
 
 _LOGGER = logging.getLogger(__name__)
 
+# Precompiled frame layouts (big endian)
+_U16 = struct.Struct('>H')
+_U8 = struct.Struct('B')
+# Header, length, key type, serial, password, command (first 21 bytes)
+_FRAME_HEADER = struct.Struct('>HHB8s6sH')
+
 class Datagram(ABC):
     """Base class for all EVSE datagrams"""
     
@@ -47,13 +53,13 @@ class Datagram(ABC):
         buffer = bytearray(buffer_size)
         
     # Header (2 bytes)
-        struct.pack_into('>H', buffer, 0, self.PACKET_HEADER)
+        _U16.pack_into(buffer, 0, self.PACKET_HEADER)
         
     # Length (2 bytes)
-        struct.pack_into('>H', buffer, 2, buffer_size)
+        _U16.pack_into(buffer, 2, buffer_size)
         
     # Key type (1 byte)
-        struct.pack_into('B', buffer, 4, self.key_type)
+        _U8.pack_into(buffer, 4, self.key_type)
         
     # Device serial (8 bytes hex)
         if self.device_serial:
@@ -66,60 +72,60 @@ class Datagram(ABC):
             buffer[13:13+len(password_bytes)] = password_bytes
         
     # Command (2 bytes)
-        struct.pack_into('>H', buffer, 19, command)
+        _U16.pack_into(buffer, 19, command)
         
     # Payload
         buffer[21:21+len(payload)] = payload
         
     # Checksum (2 bytes) - sum of all bytes except the last 4
         checksum = sum(buffer[:-4]) % 0xFFFF
-        struct.pack_into('>H', buffer, buffer_size - 4, checksum)
+        _U16.pack_into(buffer, buffer_size - 4, checksum)
         
     # Tail (2 bytes)
-        struct.pack_into('>H', buffer, buffer_size - 2, self.PACKET_TAIL)
+        _U16.pack_into(buffer, buffer_size - 2, self.PACKET_TAIL)
         
         return bytes(buffer)
     
-    def unpack(self, buffer: bytes) -> int:
-        """Unpack a datagram from a buffer"""
-        payload_length = self._validate_datagram(buffer)
+    def unpack(self, buffer: bytes, offset: int = 0) -> int:
+        """Unpack a datagram from a buffer, starting at offset"""
+        if len(buffer) - offset < 25:
+            raise ValueError("Datagram too short")
+        
+        header, length, key_type, serial_bytes, password_bytes, command = \
+            _FRAME_HEADER.unpack_from(buffer, offset)
+        payload_length = self._validate_datagram(buffer, offset, header, length)
         
-        command = struct.unpack('>H', buffer[19:21])[0]
         if command != self.get_command():
             raise ValueError(f"Unexpected command {command} for type {self.__class__.__name__}")
         
-        self.key_type = buffer[4]
-        self.device_serial = buffer[5:13].hex()
+        self.key_type = key_type
+        self.device_serial = serial_bytes.hex()
         
     # Password (may be null)
-        password_bytes = buffer[13:19]
-        if all(b == 0 for b in password_bytes):
+        if not any(password_bytes):
             self.device_password = None
         else:
             self.device_password = password_bytes.decode('ascii', errors='ignore').rstrip('\x00')
         
     # Extract and unpack the payload
-        payload = buffer[21:21 + payload_length]
+        start = offset + 21
+        payload = buffer[start:start + payload_length]
         self.unpack_payload(payload)
         
         return payload_length + 25
     
-    def _validate_datagram(self, buffer: bytes) -> int:
+    def _validate_datagram(self, buffer: bytes, offset: int, header: int, length: int) -> int:
         """Validate the datagram and return the payload length"""
-        if len(buffer) < 25:
-            raise ValueError("Datagram too short")
-        
-        header = struct.unpack('>H', buffer[0:2])[0]
         if header != self.PACKET_HEADER:
             raise ValueError("Missing magic header")
         
-        length = struct.unpack('>H', buffer[2:4])[0]
-        if length > len(buffer):
+        if offset + length > len(buffer):
             raise ValueError("Invalid length")
         
         # Verify checksum
-        computed_checksum = sum(buffer[:length-4]) % 0xFFFF
-        checksum = struct.unpack('>H', buffer[length-4:length-2])[0]
+        end = offset + length
+        computed_checksum = sum(buffer[offset:end - 4]) % 0xFFFF
+        checksum = _U16.unpack_from(buffer, end - 4)[0]
         if computed_checksum != checksum:
             raise ValueError("Invalid checksum")
         
@@ -137,7 +143,7 @@ class Datagram(ABC):
     
     def read_temperature(self, buffer: bytes, offset: int) -> float:
         """Read a temperature from the buffer"""
-        temp_raw = struct.unpack('>H', buffer[offset:offset+2])[0]
+        temp_raw = _U16.unpack_from(buffer, offset)[0]
         return (temp_raw - 100) / 10.0
     
     def set_device_serial(self, serial: str) -> 'Datagram':
@@ -196,14 +202,12 @@ def parse_datagrams(buffer: bytes) -> List[Datagram]:
     offset = 0
 
     while len(buffer) - offset >= 25:
-        # Check header
-        header = struct.unpack('>H', buffer[offset:offset+2])[0]
+        # Check header and get command
+        header, _, _, _, _, command = _FRAME_HEADER.unpack_from(buffer, offset)
         if header != Datagram.PACKET_HEADER:
             _LOGGER.warning(f"Missing magic header: {header:04x}")
             break
 
-        # Get command
-        command = struct.unpack('>H', buffer[offset+19:offset+21])[0]
         datagram_class = DATAGRAM_TYPES.get(command)
 
         if not datagram_class:
@@ -214,7 +218,7 @@ def parse_datagrams(buffer: bytes) -> List[Datagram]:
         # Create and unpack the datagram
         try:
             datagram = datagram_class()
-            length = datagram.unpack(buffer[offset:])
+            length = datagram.unpack(buffer, offset)
             datagrams.append(datagram)
             offset += length
         except Exception as e:
@@ -5,19 +5,31 @@ import struct
 from typing import Optional, List
 from .datagram import Datagram, register_datagram
 
+# Precompiled payload layouts (big endian)
+_U16 = struct.Struct('>H')
+_U32 = struct.Struct('>I')
+# SingleACStatus: line, L1 V/A, power, kWh counter, temps, states, error bits
+_AC_STATUS = struct.Struct('>BHHIIHHBBBBI')
+_AC_STATUS_PHASES = struct.Struct('>HHHH')
+_LOG_KW = struct.Struct('>60H')
+_LOG_CHARGE_DATA = struct.Struct('>48H')
+
 ###############################################################################
 # UTILITIES (from TypeScript)
 ###############################################################################
 
+def _temperature(temp_raw: int) -> float:
+    """Convert a raw temperature value (TypeScript formula)"""
+    if temp_raw == 0xffff:
+        return -1.0
+    return round((temp_raw - 20000) * 0.01, 2)
+
 def read_temperature(buffer: bytes, offset: int) -> float:
     """Read temperature using the TypeScript formula"""
     if len(buffer) < offset + 2:
         return -1.0
     
-    temp_raw = struct.unpack('>H', buffer[offset:offset+2])[0]
-    if temp_raw == 0xffff:
-        return -1.0
-    return round((temp_raw - 20000) * 0.01, 2)
+    return _temperature(_U16.unpack_from(buffer, offset)[0])
 
 def read_string(buffer: bytes, offset: int, length: int) -> str:
     """Read string using TypeScript logic"""
@@ -62,7 +74,7 @@ class Login(Datagram):
         self.brand = read_string(buffer, 1, 16)
         self.model = read_string(buffer, 17, 16) 
         self.hardware_version = read_string(buffer, 33, 16)
-        self.max_power = struct.unpack('>I', buffer[49:53])[0]
+        self.max_power = _U32.unpack_from(buffer, 49)[0]
         self.max_electricity = buffer[53]
         
         if len(buffer) > 54:
@@ -117,20 +129,16 @@ class SingleACStatus(Datagram):
             raise ValueError("Buffer too short for SingleACStatus")
 
         # Exact order from TypeScript
-        self.line_id = buffer[0]
-        self.l1_voltage = struct.unpack('>H', buffer[1:3])[0] * 0.1
-        self.l1_electricity = struct.unpack('>H', buffer[3:5])[0] * 0.01
-        self.current_power = struct.unpack('>I', buffer[5:9])[0]
-        self.total_kwh_counter = struct.unpack('>I', buffer[9:13])[0] * 0.01
-        self.inner_temp = read_temperature(buffer, 13)
-        self.outer_temp = read_temperature(buffer, 15)
-        self.emergency_btn_state = buffer[17]
-        self.gun_state = buffer[18]
-        self.output_state = buffer[19]
-        self.current_state = buffer[20]
+        (self.line_id, l1_voltage, l1_electricity, self.current_power, total_kwh,
+         inner_temp, outer_temp, self.emergency_btn_state, self.gun_state,
+         self.output_state, self.current_state, error_bits) = _AC_STATUS.unpack_from(buffer, 0)
+        self.l1_voltage = l1_voltage * 0.1
+        self.l1_electricity = l1_electricity * 0.01
+        self.total_kwh_counter = total_kwh * 0.01
+        self.inner_temp = _temperature(inner_temp)
+        self.outer_temp = _temperature(outer_temp)
         
         # Errors (32-bit bitfield)
-        error_bits = struct.unpack('>I', buffer[21:25])[0]
         self.errors = []
         for i in range(32):
             if error_bits & (1 << i):
@@ -138,10 +146,11 @@ class SingleACStatus(Datagram):
         
         # Optional three-phase (if buffer long enough)
         if len(buffer) >= 33:
-            self.l2_voltage = struct.unpack('>H', buffer[25:27])[0] * 0.1
-            self.l2_electricity = struct.unpack('>H', buffer[27:29])[0] * 0.01
-            self.l3_voltage = struct.unpack('>H', buffer[29:31])[0] * 0.1  
-            self.l3_electricity = struct.unpack('>H', buffer[31:33])[0] * 0.01
+            l2_voltage, l2_electricity, l3_voltage, l3_electricity = _AC_STATUS_PHASES.unpack_from(buffer, 25)
+            self.l2_voltage = l2_voltage * 0.1
+            self.l2_electricity = l2_electricity * 0.01
+            self.l3_voltage = l3_voltage * 0.1
+            self.l3_electricity = l3_electricity * 0.01
 
 @register_datagram
 class SingleACStatusResponse(Datagram):
@@ -281,7 +290,7 @@ class GetVersionResponse(Datagram):
         if len(buffer) >= 37:
             self.hardware_version = read_string(buffer, 0, 16)
             self.software_version = read_string(buffer, 16, 32)
-            self.feature = struct.unpack('>I', buffer[32:36])[0]
+            self.feature = _U32.unpack_from(buffer, 32)[0]
             self.support_new = buffer[36]
 
 # ============================================================================
@@ -340,17 +349,16 @@ class ChargeStart(Datagram):
         buffer[33] = 0
 
         # reservationDate (4 bytes, big endian)
-        import struct
-        buffer[34:38] = struct.pack('>I', self.reservation_date)
+        _U32.pack_into(buffer, 34, self.reservation_date)
 
         # startType, chargeType
         buffer[38] = self.start_type
         buffer[39] = self.charge_type
 
         # params (big endian)
-        buffer[40:42] = struct.pack('>H', self.max_duration_minutes)
-        buffer[42:44] = struct.pack('>H', self.max_energy_kwh)
-        buffer[44:46] = struct.pack('>H', self.param3)
+        _U16.pack_into(buffer, 40, self.max_duration_minutes)
+        _U16.pack_into(buffer, 42, self.max_energy_kwh)
+        _U16.pack_into(buffer, 44, self.param3)
 
         # maxElectricity
         buffer[46] = self.max_electricity
@@ -463,43 +471,35 @@ class CurrentChargeRecord(Datagram):
         self.has_reservation = buffer[49]
         self.start_type = buffer[50]
         self.charge_type = buffer[51]
-        self.charge_param1 = struct.unpack('>H', buffer[52:54])[0]
-        self.charge_param2 = struct.unpack('>H', buffer[54:56])[0] * 0.001
-        self.charge_param3 = struct.unpack('>H', buffer[56:58])[0] * 0.01
+        self.charge_param1 = _U16.unpack_from(buffer, 52)[0]
+        self.charge_param2 = _U16.unpack_from(buffer, 54)[0] * 0.001
+        self.charge_param3 = _U16.unpack_from(buffer, 56)[0] * 0.01
         self.stop_reason = buffer[58]
         self.has_stop_charge = buffer[59]
-        self.reservation_data = struct.unpack('>I', buffer[60:64])[0]
-        self.start_date = struct.unpack('>I', buffer[64:68])[0]
-        self.stop_date = struct.unpack('>I', buffer[68:72])[0]
-        self.charged_time = struct.unpack('>I', buffer[72:76])[0]
-        self.charge_start_power = struct.unpack('>I', buffer[76:80])[0] * 0.01
-        self.charge_stop_power = struct.unpack('>I', buffer[80:84])[0] * 0.01
-        self.charge_power = struct.unpack('>I', buffer[84:88])[0] * 0.01
-        self.charge_price = struct.unpack('>I', buffer[88:92])[0] * 0.01
+        self.reservation_data = _U32.unpack_from(buffer, 60)[0]
+        self.start_date = _U32.unpack_from(buffer, 64)[0]
+        self.stop_date = _U32.unpack_from(buffer, 68)[0]
+        self.charged_time = _U32.unpack_from(buffer, 72)[0]
+        self.charge_start_power = _U32.unpack_from(buffer, 76)[0] * 0.01
+        self.charge_stop_power = _U32.unpack_from(buffer, 80)[0] * 0.01
+        self.charge_power = _U32.unpack_from(buffer, 84)[0] * 0.01
+        self.charge_price = _U32.unpack_from(buffer, 88)[0] * 0.01
         self.fee_type = buffer[92]
-        self.charge_fee = struct.unpack('>H', buffer[93:95])[0] * 0.01
-        self.log_kw_length = struct.unpack('>H', buffer[95:97])[0]
+        self.charge_fee = _U16.unpack_from(buffer, 93)[0] * 0.01
+        self.log_kw_length = _U16.unpack_from(buffer, 95)[0]
         
         # Logs optionnels selon la longueur
         if len(buffer) >= 156:
-            self.log_kw = []
-            for i in range(60):
-                self.log_kw.append(struct.unpack('>H', buffer[96 + i*2:98 + i*2])[0])
+            self.log_kw = list(_LOG_KW.unpack_from(buffer, 96))
                 
         if len(buffer) >= 252:
-            self.log_charge_data_kwh = []
-            for i in range(0, 96, 2):
-                self.log_charge_data_kwh.append(struct.unpack('>H', buffer[156 + i:158 + i])[0])
+            self.log_charge_data_kwh = list(_LOG_CHARGE_DATA.unpack_from(buffer, 156))
                 
         if len(buffer) >= 348:
-            self.log_charge_data_charge_fee = []
-            for i in range(0, 96, 2):
-                self.log_charge_data_charge_fee.append(struct.unpack('>H', buffer[252 + i:254 + i])[0])
+            self.log_charge_data_charge_fee = list(_LOG_CHARGE_DATA.unpack_from(buffer, 252))
                 
         if len(buffer) >= 446:
-            self.log_charge_data_service_fee = []
-            for i in range(0, 96, 2):
-                self.log_charge_data_service_fee.append(struct.unpack('>H', buffer[348 + i:350 + i])[0])
+            self.log_charge_data_service_fee = list(_LOG_CHARGE_DATA.unpack_from(buffer, 348))
 
 @register_datagram
 class RequestChargeStatusRecord(Datagram):
@@ -561,41 +561,41 @@ class SingleACChargingStatusPublicAuto(Datagram):
         if len(buffer) < 74:
             return
             
-        self.port = struct.unpack('B', buffer[0:1])[0]
+        self.port = buffer[0]
         
     # Charging state (with variable position handling according to TypeScript)
         if len(buffer) <= 74 or buffer[74] not in [18, 19]:
-            self.current_state = struct.unpack('B', buffer[1:2])[0]
+            self.current_state = buffer[1]
         else:
-            self.current_state = struct.unpack('B', buffer[74:75])[0]
+            self.current_state = buffer[74]
             
         self.charge_id = read_string(buffer, 2, 16)
-        self.start_type = struct.unpack('B', buffer[18:19])[0]
-        self.charge_type = struct.unpack('B', buffer[19:20])[0]
+        self.start_type = buffer[18]
+        self.charge_type = buffer[19]
         
     # Max duration (65535 = undefined)
-        max_duration_raw = struct.unpack('>H', buffer[20:22])[0]
+        max_duration_raw = _U16.unpack_from(buffer, 20)[0]
         self.max_duration_minutes = None if max_duration_raw == 65535 else max_duration_raw
         
     # Max energy (65535 = undefined)
-        max_energy_raw = struct.unpack('>H', buffer[22:24])[0]
+        max_energy_raw = _U16.unpack_from(buffer, 22)[0]
         self.max_energy_kwh = None if max_energy_raw == 65535 else max_energy_raw * 0.01
         
     # Parameter 3 (65535 = undefined)
-        param3_raw = struct.unpack('>H', buffer[24:26])[0]
+        param3_raw = _U16.unpack_from(buffer, 24)[0]
         self.charge_param3 = None if param3_raw == 65535 else param3_raw * 0.01
         
-        self.reservation_date = struct.unpack('>I', buffer[26:30])[0]
+        self.reservation_date = _U32.unpack_from(buffer, 26)[0]
         self.user_id = read_string(buffer, 30, 16)
-        self.max_electricity = struct.unpack('B', buffer[46:47])[0]
-        self.start_date = struct.unpack('>I', buffer[47:51])[0]
-        self.duration_seconds = struct.unpack('>I', buffer[51:55])[0]
-        self.start_kwh_counter = struct.unpack('>I', buffer[55:59])[0] * 0.01
-        self.current_kwh_counter = struct.unpack('>I', buffer[59:63])[0] * 0.01
-        self.charge_kwh = struct.unpack('>I', buffer[63:67])[0] * 0.01
-        self.charge_price = struct.unpack('>I', buffer[67:71])[0] * 0.01
-        self.fee_type = struct.unpack('B', buffer[71:72])[0]
-        self.charge_fee = struct.unpack('>H', buffer[72:74])[0] * 0.01
+        self.max_electricity = buffer[46]
+        self.start_date = _U32.unpack_from(buffer, 47)[0]
+        self.duration_seconds = _U32.unpack_from(buffer, 51)[0]
+        self.start_kwh_counter = _U32.unpack_from(buffer, 55)[0] * 0.01
+        self.current_kwh_counter = _U32.unpack_from(buffer, 59)[0] * 0.01
+        self.charge_kwh = _U32.unpack_from(buffer, 63)[0] * 0.01
+        self.charge_price = _U32.unpack_from(buffer, 67)[0] * 0.01
+        self.fee_type = buffer[71]
+        self.charge_fee = _U16.unpack_from(buffer, 72)[0] * 0.01
 
 @register_datagram
 class SingleACChargingStatusResponse(Datagram):
@@ -684,7 +684,7 @@ class SetAndGetSystemTime(Datagram):
     # Send current Unix timestamp
         import time
         timestamp = int(time.time())
-        return struct.pack('>I', timestamp)
+        return _U32.pack(timestamp)
     
     def unpack_payload(self, buffer: bytes) -> None:
         pass
@@ -703,7 +703,7 @@ class SetAndGetSystemTimeResponse(Datagram):
     
     def unpack_payload(self, buffer: bytes) -> None:
         if len(buffer) >= 4:
-            self.timestamp = struct.unpack('>I', buffer[0:4])[0]
+            self.timestamp = _U32.unpack_from(buffer, 0)[0]
 
 @register_datagram
 class SetAndGetOffLineCharge(Datagram):
@@ -715,11 +715,11 @@ class SetAndGetOffLineCharge(Datagram):
         self.offline_enabled: bool = False
     
     def pack_payload(self) -> bytes:
-        return struct.pack('B', 1 if self.offline_enabled else 0)
+        return bytes([1 if self.offline_enabled else 0])
     
     def unpack_payload(self, buffer: bytes) -> None:
         if len(buffer) >= 1:
-            self.offline_enabled = struct.unpack('B', buffer[0:1])[0] == 1
+            self.offline_enabled = buffer[0] == 1
 
 @register_datagram
 class SetAndGetOffLineChargeResponse(Datagram):
@@ -735,4 +735,4 @@ class SetAndGetOffLineChargeResponse(Datagram):
     
     def unpack_payload(self, buffer: bytes) -> None:
         if len(buffer) >= 1:
-            self.offline_enabled = struct.unpack('B', buffer[0:1])[0] == 1
\ No newline at end of file
+            self.offline_enabled = buffer[0] == 1
\ No newline at end of file
@@ -79,6 +79,116 @@ async def test_datagram_packing():
     except Exception as e:
         return False, str(e)
 
+def build_frame(command, payload, serial="1368844619649410", password="123456"):
+    """Construit une trame à la main, sans passer par Datagram.pack()"""
+    from protocol.datagram import Datagram
+    
+    frame = bytearray(25 + len(payload))
+    frame[0:2] = Datagram.PACKET_HEADER.to_bytes(2, 'big')
+    frame[2:4] = len(frame).to_bytes(2, 'big')
+    frame[5:13] = bytes.fromhex(serial)
+    frame[13:13 + len(password)] = password.encode('ascii')
+    frame[19:21] = command.to_bytes(2, 'big')
+    frame[21:21 + len(payload)] = payload
+    frame[-4:-2] = (sum(frame[:-4]) % 0xFFFF).to_bytes(2, 'big')
+    frame[-2:] = Datagram.PACKET_TAIL.to_bytes(2, 'big')
+    return bytes(frame)
+
+async def test_datagram_parsing():
+    """Test décodage de plusieurs trames dans un même buffer"""
+    try:
+        print("📥 Test décodage multi-trames...")
+        
+        from protocol.datagram import parse_datagrams
+        from protocol.datagrams import RequestLogin, LoginResponse
+        
+        login = RequestLogin()
+        login.set_device_serial("1368844619649410")
+        login.set_device_password("123456")
+        
+        # Trame sans mot de passe entre deux trames encodées par pack()
+        buffer = login.pack() + build_frame(LoginResponse.COMMAND, b'\x01\x02', password="") + login.pack()
+        datagrams = parse_datagrams(buffer)
+        
+        commands = [d.get_command() for d in datagrams]
+        expected = [RequestLogin.COMMAND, LoginResponse.COMMAND, RequestLogin.COMMAND]
+        if commands != expected:
+            return False, f"commandes {commands} au lieu de {expected}"
+        for datagram in datagrams:
+            if datagram.get_device_serial() != "1368844619649410":
+                return False, f"numéro de série {datagram.get_device_serial()}"
+        passwords = [d.get_device_password() for d in datagrams]
+        if passwords != ["123456", None, "123456"]:
+            return False, f"mots de passe {passwords}"
+        print(f"  ✅ {len(datagrams)} trames décodées ({len(buffer)} bytes)")
+        
+        # Une trame tronquée en fin de buffer est ignorée
+        datagrams = parse_datagrams(buffer + login.pack()[:20])
+        if len(datagrams) != 3:
+            return False, f"{len(datagrams)} trames avec une trame tronquée"
+        print("  ✅ Trame tronquée ignorée")
+        
+        return True, None
+        
+    except Exception as e:
+        return False, str(e)
+
+async def test_status_parsing():
+    """Test décodage d'un SingleACStatus triphasé (33 bytes)"""
+    try:
+        print("⚡ Test décodage SingleACStatus...")
+        
+        from protocol.datagram import parse_datagrams
+        from protocol.datagrams import SingleACStatus
+        
+        # Champs à la main, dans l'ordre de SingleACStatus.ts
+        payload = (
+            bytes([1])                          # line_id
+            + (2301).to_bytes(2, 'big')         # L1 230.1 V
+            + (1550).to_bytes(2, 'big')         # L1 15.50 A
+            + (3565).to_bytes(4, 'big')         # 3565 W
+            + (123456).to_bytes(4, 'big')       # 1234.56 kWh
+            + (22550).to_bytes(2, 'big')        # intérieur 25.5 °C
+            + (0xffff).to_bytes(2, 'big')       # extérieur absent
+            + bytes([0, 2, 1, 4])               # bouton, pistolet, sortie, état
+            + (0x80000005).to_bytes(4, 'big')   # erreurs 0, 2 et 31
+            + (2312).to_bytes(2, 'big')         # L2 231.2 V
+            + (1000).to_bytes(2, 'big')         # L2 10.00 A
+            + (2298).to_bytes(2, 'big')         # L3 229.8 V
+            + (25).to_bytes(2, 'big')           # L3 0.25 A
+        )
+        if len(payload) != 33:
+            return False, f"payload de {len(payload)} bytes"
+        
+        datagrams = parse_datagrams(build_frame(SingleACStatus.COMMAND, payload))
+        if len(datagrams) != 1 or not isinstance(datagrams[0], SingleACStatus):
+            return False, f"trames décodées: {datagrams}"
+        status = datagrams[0]
+        
+        expected = {
+            'line_id': 1, 'l1_voltage': 230.1, 'l1_electricity': 15.5,
+            'current_power': 3565, 'total_kwh_counter': 1234.56,
+            'inner_temp': 25.5, 'outer_temp': -1.0,
+            'emergency_btn_state': 0, 'gun_state': 2, 'output_state': 1,
+            'current_state': 4, 'errors': [0, 2, 31],
+            'l2_voltage': 231.2, 'l2_electricity': 10.0,
+            'l3_voltage': 229.8, 'l3_electricity': 0.25,
+        }
+        for field, value in expected.items():
+            actual = getattr(status, field)
+            if isinstance(value, float):
+                ok = abs(actual - value) < 1e-6
+            else:
+                ok = actual == value
+            if not ok:
+                return False, f"{field} = {actual!r} au lieu de {value!r}"
+        print(f"  ✅ {len(expected)} champs décodés")
+        
+        return True, None
+        
+    except Exception as e:
+        return False, str(e)
+
 async def test_communicator_creation():
     """Test création communicateur"""
     try:
@@ -96,6 +206,83 @@ async def test_communicator_creation():
     except Exception as e:
         return False, str(e)
 
+async def test_response_waiters():
+    """Test attentes de réponse simultanées"""
+    try:
+        print("⏳ Test attentes de réponse simultanées...")
+        
+        from protocol.communicator import Communicator, EVSE
+        from protocol.datagrams import (
+            LoginResponse, PasswordErrorResponse,
+            SetAndGetOutputElectricityResponse,
+        )
+        
+        evse = EVSE(Communicator(), "1368844619649410", "127.0.0.1", 28376)
+        
+        # Login puis réglage du courant en attente en même temps
+        login = asyncio.ensure_future(evse._wait_for_response(
+            [LoginResponse.COMMAND, PasswordErrorResponse.COMMAND], 1.0))
+        current = asyncio.ensure_future(evse._wait_for_response(
+            [SetAndGetOutputElectricityResponse.COMMAND], 1.0))
+        await asyncio.sleep(0)
+        
+        # Les réponses arrivent dans l'ordre inverse
+        evse._deliver_response(SetAndGetOutputElectricityResponse())
+        evse._deliver_response(LoginResponse())
+        
+        login_response, current_response = await asyncio.gather(login, current)
+        if not isinstance(login_response, LoginResponse):
+            return False, f"login a reçu {login_response!r}"
+        if not isinstance(current_response, SetAndGetOutputElectricityResponse):
+            return False, f"réglage du courant a reçu {current_response!r}"
+        if evse._response_waiters:
+            return False, "attentes non nettoyées"
+        print("  ✅ Chaque attente reçoit sa réponse")
+        
+        return True, None
+        
+    except Exception as e:
+        return False, str(e)
+
+async def test_login_wrong_password():
+    """Test mauvais mot de passe avec broadcast de découverte simultané"""
+    try:
+        print("🔑 Test mauvais mot de passe + broadcast...")
+        
+        from protocol.communicator import Communicator, EVSE
+        from protocol.datagrams import Login, RequestLogin, PasswordErrorResponse
+        
+        class FakeCommunicator(Communicator):
+            """Répond PasswordErrorResponse, précédé d'un broadcast Login"""
+            async def send(self, datagram, evse):
+                if isinstance(datagram, RequestLogin):
+                    loop = asyncio.get_running_loop()
+                    loop.call_soon(asyncio.ensure_future, self._handle_login(evse, Login()))
+                    loop.call_later(0.01, evse._deliver_response, PasswordErrorResponse())
+                return 0
+        
+        comm = FakeCommunicator()
+        evse = EVSE(comm, "1368844619649410", "127.0.0.1", 28376)
+        comm.evses[evse.info.serial] = evse
+        
+        if await evse.login("wrong"):
+            return False, "login accepté avec un mauvais mot de passe"
+        if evse.login_event.is_set() or evse.is_logged_in():
+            return False, "EVSE resté connecté après un échec"
+        print("  ✅ Échec de login: EVSE déconnecté")
+        
+        # Broadcast pendant le délai entre deux tentatives
+        asyncio.get_running_loop().call_later(
+            0.01, asyncio.ensure_future, comm._handle_login(evse, Login()))
+        if await evse.wait_for_login("wrong", 0.1):
+            return False, f"login signalé sans mot de passe (password={evse.password!r})"
+        print("  ✅ Broadcast non pris pour un login")
+        
+        return True, None
+        
+    except Exception as e:
+        return False, str(e)
+
 async def test_network_socket():
     """Test création socket UDP"""
     try:
@@ -127,7 +314,11 @@ async def main():
         ("Import des modules", test_basic_import),
         ("Création datagrammes", test_datagram_creation),
         ("Encodage/décodage", test_datagram_packing),
+        ("Décodage multi-trames", test_datagram_parsing),
+        ("Décodage SingleACStatus", test_status_parsing),
         ("Communicateur", test_communicator_creation),
+        ("Attentes de réponse", test_response_waiters),
+        ("Mauvais mot de passe", test_login_wrong_password),
         ("Socket réseau", test_network_socket),
     ]
     